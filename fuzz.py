@@ -0,0 +1,161 @@
+import os
+import argparse
+import textwrap
+import random
+import sys
+import tempfile
+import time
+from genesis.common import ROM
+from genesis.data_compression import LZANCIENT, VerificationError
+
+cmd = argparse.ArgumentParser(
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    description=textwrap.dedent('''\
+            [SMD] LZANCIENT Differential Fuzzer
+            ----------------------------------------------
+            Compress randomly generated data and check it
+            against the reference decompressor and the
+            in-memory verifier until the time budget ends.
+            Mutated streams must be accepted or rejected
+            by both decoders alike.
+            ----------------------------------------------
+            Usage:
+                python fuzz.py [--seconds N] [--seed N] [--max-size N]
+        ''')
+)
+
+
+def generate(rng, max_size):
+    data = bytearray()
+    size = rng.randint(0, max_size)
+    while len(data) < size:
+        kind = rng.randint(0, 3)
+        length = rng.randint(1, 0x180)
+        if kind == 0:
+            # RAW
+            data += bytes(rng.getrandbits(8) for i in range(length))
+        elif kind == 1:
+            # RLE
+            data += bytes([rng.getrandbits(8)]) * length
+        elif kind == 2 and len(data) > 0:
+            # LZ
+            position = rng.randint(1, min(len(data), 0x1FFE))
+            for i in range(length):
+                data.append(data[len(data)-position])
+        else:
+            # Small alphabet, mixes every token type
+            data += bytes(rng.choice(b'\x00\x01\xFF') for i in range(length))
+    return bytes(data[:size])
+
+
+def reference_decompress(stream, workdir):
+    compressed_path = os.path.join(workdir, 'compressed.bin')
+    with open(compressed_path, 'wb') as f:
+        f.write(stream)
+    rom = ROM(compressed_path, 'msb')
+    output = LZANCIENT(rom).decompress(0)
+    rom.close()
+    return output
+
+
+def roundtrip(data, workdir):
+    input_path = os.path.join(workdir, 'input.bin')
+    with open(input_path, 'wb') as f:
+        f.write(data)
+    rom = ROM(input_path, 'msb')
+    compressed = LZANCIENT(rom).compress(verify=True)
+    rom.close()
+    output = reference_decompress(compressed, workdir)
+    if output != data:
+        for i in range(min(len(output), len(data))):
+            if output[i] != data[i]:
+                break
+        else:
+            i = min(len(output), len(data))
+        raise ValueError(
+            'Reference decoder mismatch at output offset {:08x}'.format(i))
+    return compressed
+
+
+def mutate(rng, data, compressed, workdir):
+    # Flip bits past the size header so token bytes the compressor
+    # never emits still go through both decoders
+    stream = bytearray(compressed)
+    if len(stream) < 4:
+        return
+    for i in range(rng.randint(1, 3)):
+        stream[rng.randrange(2, len(stream))] ^= 1 << rng.randrange(8)
+    try:
+        accepted = reference_decompress(stream, workdir) == data
+    except Exception:
+        accepted = False
+    try:
+        LZANCIENT(None).verify(stream, data)
+        verified = True
+    except VerificationError:
+        verified = False
+    if accepted != verified:
+        error = ValueError(
+            'Verifier {} a mutated stream the reference decoder {}'.format(
+                'accepted' if verified else 'rejected',
+                'rejected' if verified else 'accepted'))
+        error.stream = bytes(stream)
+        raise error
+
+
+def fuzz(seconds, seed, max_size):
+    rng = random.Random(seed)
+    deadline = time.time() + seconds
+    cases = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        while time.time() < deadline:
+            data = generate(rng, max_size)
+            try:
+                compressed = roundtrip(data, workdir)
+                mutate(rng, data, compressed, workdir)
+            except Exception as e:
+                print('[ERROR] Case {} (seed {}): {}: {}'.format(
+                    cases, seed, type(e).__name__, e))
+                with open('fuzz_failure.bin', 'wb') as f:
+                    f.write(data)
+                print('[ERROR] Input saved to fuzz_failure.bin')
+                if hasattr(e, 'stream'):
+                    with open('fuzz_failure_stream.bin', 'wb') as f:
+                        f.write(e.stream)
+                    print('[ERROR] Mutated stream saved to fuzz_failure_stream.bin')
+                return 1
+            cases += 1
+    print('[INFO] {} cases passed'.format(cases))
+    return 0
+
+
+if __name__ == "__main__":
+
+    cmd.add_argument(
+        '--seconds',
+        type=float,
+        default=10,
+        help='Time budget in seconds'
+    )
+
+    cmd.add_argument(
+        '--seed',
+        type=lambda x: int(x, 0),
+        default=None,
+        help='Random seed'
+    )
+
+    cmd.add_argument(
+        '--max-size',
+        type=lambda x: int(x, 0),
+        default=0x400,
+        help='Maximum size of generated data'
+    )
+
+    args = cmd.parse_args()
+    print(cmd.description)
+    if args.seed == None:
+        args.seed = random.getrandbits(32)
+    print('[INFO] Fuzzing for {}s with seed {:08x}...'.format(
+        args.seconds, args.seed))
+    sys.exit(fuzz(args.seconds, args.seed, args.max_size))
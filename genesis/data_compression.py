@@ -3,6 +3,21 @@ import sys
 from romhacking.common import BitArray, RingBuffer, Compression, LZSS
 
 
+class VerificationError(ValueError):
+    """
+        Raised when a compressed stream does not decode
+        back to the original data
+    """
+
+    def __init__(self, offset, token_offset, token):
+        self.offset = offset
+        self.token_offset = token_offset
+        self.token = token
+        super(VerificationError, self).__init__(
+            'Mismatch at output offset {:08x} (token {:02x} at {:08x})'.format(
+                offset, token, token_offset))
+
+
 class LZANCIENT(LZSS):
     """
         Class to manipulate LZANCIENT Compression
@@ -81,7 +96,7 @@ class LZANCIENT(LZSS):
                         self._output.append(self.DATA.read_8())
         return self._output
 
-    def compress(self):
+    def compress(self, verify=False):
         self.DATA.ENDIAN = '<'
         self._window = RingBuffer(0x2000, 0x00, 0x00)
         self._input = bytearray(self.DATA.read())
@@ -99,7 +114,8 @@ class LZANCIENT(LZSS):
             if (rle_match < 4) and (lz_match[0] < 4):
                 _readed = self.DATA.read_8()
                 self._window.append(_readed)
-                if self._window.CURSOR > 0x1FFF:
+                # RAW length is a single byte for the decoder
+                if self._window.CURSOR >= 0xFF:
                     self.flush_window()
                 self._encoded += 1
             # RLE
@@ -138,8 +154,96 @@ class LZANCIENT(LZSS):
         self._output[0] = len(self._output) & 0xFF
         self._output[1] = len(self._output) >> 8
         self._output.append(0x0)
+        if verify:
+            self.verify(self._output, self._input)
         return self._output
 
+    def verify(self, data, expected):
+        """
+            Decode a compressed stream in memory into a buffer
+            preallocated to the expected size and compare it
+            token by token, raising VerificationError at the
+            first mismatching byte
+        """
+        src = memoryview(data)
+        ref = memoryview(expected)
+        out = memoryview(bytearray(len(expected)))
+        size = len(expected)
+        written = 0
+        cursor = 0
+        token_offset = 0
+        token = 0
+        try:
+            if src[2] != 0x0:
+                compressed_size = (src[1] << 8) | src[0]
+                cursor = 2
+                while cursor < compressed_size:
+                    start = written
+                    token_offset = cursor
+                    token = ctrl = src[cursor]
+                    cursor += 1
+                    if ctrl & 0x80:
+                        # LZ From buffer
+                        length = ((ctrl >> 5) & 0x3) + 4
+                        position = ((ctrl & 0x1F) << 8) | src[cursor]
+                        cursor += 1
+                        while (src[cursor] & 0xE0) == 0x60:
+                            length += src[cursor] & 0x1F
+                            cursor += 1
+                        if position == 0 or position > written:
+                            raise IndexError
+                        written = self._copy_back(
+                            out, written, position, min(length, size-written))
+                    elif ctrl & 0x40:
+                        # RLE, bit 5 still counts as in decompress
+                        if ctrl & 0x10:
+                            length = (((ctrl & 0x2F) << 8) | src[cursor]) + 4
+                            cursor += 1
+                        else:
+                            length = (ctrl & 0x2F) + 4
+                        value = src[cursor]
+                        cursor += 1
+                        if written < size:
+                            out[written] = value
+                            written = self._copy_back(
+                                out, written+1, 1, min(length, size-written)-1)
+                    else:
+                        # RAW
+                        if ctrl & 0x20:
+                            length = src[cursor]
+                            cursor += 1
+                        else:
+                            length = ctrl
+                        if cursor+length > len(src):
+                            raise IndexError
+                        chunk = min(length, size-written)
+                        out[written:written+chunk] = src[cursor:cursor+chunk]
+                        cursor += length
+                        written += chunk
+                    if out[start:written] != ref[start:written]:
+                        for i in range(start, written):
+                            if out[i] != ref[i]:
+                                raise VerificationError(
+                                    i, token_offset, token)
+                    # Output longer than the input
+                    if written-start < length:
+                        raise VerificationError(size, token_offset, token)
+        except IndexError:
+            raise VerificationError(written, token_offset, token)
+        if written != size:
+            raise VerificationError(written, token_offset, token)
+
+    def _copy_back(self, out, written, position, length):
+        # Overlapping copies repeat the last "position" bytes,
+        # so grow the copied span instead of going byte by byte
+        source = written - position
+        end = written + length
+        while written < end:
+            chunk = min(written - source, end - written)
+            out[written:written+chunk] = out[source:source+chunk]
+            written += chunk
+        return written
+
     def find_best_rle_match(self):
         best_match = 0
         for i in range(min(0xFFF+4, self.DATA.SIZE-self._encoded)):
@@ -5,7 +5,7 @@ import sys
 from os import SEEK_CUR, SEEK_END, SEEK_SET
 from romhacking.common import TBL
 from genesis.common import ROM
-from genesis.data_compression import LZANCIENT
+from genesis.data_compression import LZANCIENT, VerificationError
 
 cmd = argparse.ArgumentParser(
     formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -24,6 +24,8 @@ cmd = argparse.ArgumentParser(
                 python main.py D rom decompressed_file offset
             For compress:
                 python main.py C rom decompressed_file offset_to_be_inserted_in_rom
+            For compress and verify before inserting:
+                python main.py C rom decompressed_file offset_to_be_inserted_in_rom --verify
         ''')
 )
 
@@ -39,11 +41,18 @@ def decompress(offset, rom_path, decompressed_data_path, codec=None):
     print('[INFO] Finished!')
 
 
-def compress(offset, rom_path, decompressed_data_path, codec=None):
-    rom = open(rom_path, 'r+b')
+def compress(offset, rom_path, decompressed_data_path, codec=None, verify=False):
     input = ROM(decompressed_data_path, 'msb')
     algorithm = codec(input)
-    data = algorithm.compress()
+    try:
+        data = algorithm.compress(verify)
+    except VerificationError as e:
+        input.close()
+        print('[ERROR] Verification failed: {}'.format(e))
+        sys.exit(1)
+    if verify:
+        print('[INFO] Verified!')
+    rom = open(rom_path, 'r+b')
     data_len = len(data)
     print('[INFO] Compressed Size: {:08x}'.format(data_len))
     rom.seek(offset, 0)
@@ -87,6 +96,12 @@ if __name__ == "__main__":
         help='Offset'
     )
 
+    cmd.add_argument(
+        '--verify',
+        action='store_true',
+        help='Decompress in memory and compare before inserting'
+    )
+
     args = cmd.parse_args()
     print(cmd.description)
     if args.option not in ['C', 'D']:
@@ -108,4 +123,5 @@ if __name__ == "__main__":
     else:
         print('[INFO] Compressing and inserting at {:08x}...'.format(
             args.offset))
-        compress(args.offset, args.rom.name, args.output, LZANCIENT)
+        compress(args.offset, args.rom.name, args.output, LZANCIENT,
+                 args.verify)